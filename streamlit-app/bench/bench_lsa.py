@@ -0,0 +1,85 @@
+# MovieFlix - benchmark of the LSA (truncated SVD) stage
+#
+# Builds the recommender in the raw TF-IDF space and in latent spaces of
+# several sizes and reports, per space: build time, per-query latency (one
+# exact similarity row plus its top-k) and the mean top-k overlap with the
+# raw TF-IDF neighbors. --fallback measures the scikit-learn-less engine by
+# hiding scikit-learn from the import.
+#
+#   python bench/bench_lsa.py --components 64 128 300
+#   python bench/bench_lsa.py --components 64 128 300 --fallback
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build time, query time and overlap of LSA vs raw TF-IDF")
+    parser.add_argument("--movies", help="Movies CSV (default: same lookup as the app)")
+    parser.add_argument("--credits", help="Credits CSV (default: same lookup as the app)")
+    parser.add_argument("--components", type=int, nargs="+", default=[64, 128, 300],
+                        help="Latent dimensions to compare (default: 64 128 300)")
+    parser.add_argument("-k", type=int, default=10, help="Neighbors compared per query (default: 10)")
+    parser.add_argument("--top-k", type=int, default=50, help="Neighbors stored per movie (default: 50)")
+    parser.add_argument("--queries", type=int, default=500, help="Movies sampled as queries (default: 500)")
+    parser.add_argument("--fallback", action="store_true", help="Build without scikit-learn")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.fallback:
+        # A None entry makes every later `import sklearn...` raise ImportError
+        sys.modules["sklearn"] = None
+    from utils import MovieRecommender, SKLEARN_AVAILABLE, _rows_similarity, find_data_files, top_k_indices
+
+    movies_path, credits_path = args.movies, args.credits
+    if not (movies_path and credits_path):
+        movies_path, credits_path = find_data_files()
+    if not (movies_path and credits_path):
+        print("❌ Could not find the movies/credits CSV files; pass --movies and --credits")
+        return 1
+
+    results = []
+    reference = None
+    for n_components in [None] + args.components:
+        recommender = MovieRecommender(similarity_backend="topk", top_k=args.top_k, dtype="float32",
+                                       n_components=n_components)
+        start = time.perf_counter()
+        if not recommender.load_and_process_data(movies_path, credits_path):
+            print("❌ Failed to build the recommender")
+            return 1
+        build_seconds = time.perf_counter() - start
+
+        n_movies = recommender.feature_matrix.shape[0]
+        if reference is None:
+            sample = np.random.default_rng(0).choice(n_movies, size=min(args.queries, n_movies), replace=False)
+
+        neighbors = []
+        start = time.perf_counter()
+        for row in sample.tolist():
+            scores = _rows_similarity(recommender.feature_matrix, slice(row, row + 1))[0]
+            scores[row] = -np.inf
+            neighbors.append(top_k_indices(scores, args.k)[0])
+        query_ms = (time.perf_counter() - start) / len(sample) * 1000
+
+        if reference is None:
+            reference = neighbors
+        overlap = np.mean([len(np.intersect1d(found, expected)) / max(1, len(expected))
+                           for found, expected in zip(neighbors, reference)])
+        space = f"lsa-{n_components}" if n_components else "tf-idf"
+        results.append((space, build_seconds, query_ms, overlap))
+
+    engine = "scikit-learn" if SKLEARN_AVAILABLE else "fallback"
+    print(f"\n{n_movies:,} movies, {engine}, top-{args.top_k} index, float32, {len(sample)} queries")
+    print(f"{'space':<10} {'build':>8} {'query':>9} {'overlap@' + str(args.k):>11}")
+    for space, build_seconds, query_ms, overlap in results:
+        print(f"{space:<10} {build_seconds:>7.2f}s {query_ms:>7.2f}ms {overlap:>11.3f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
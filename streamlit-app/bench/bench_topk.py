@@ -0,0 +1,68 @@
+# MovieFlix - benchmark of the per-query ranking step
+#
+# Ranks one similarity row per query the way get_recommendations used to
+# (enumerate + sorted + slice over N Python tuples) and the way it does now
+# (copy the row, exclude the movie by index, top_k_indices), for catalogs of
+# several sizes. Rows are random, so no data files are needed.
+#
+#   python bench/bench_topk.py --sizes 5000 50000 500000 -k 10
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from utils import top_k_indices
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Per-query top-k ranking latency, old sort vs argpartition")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 50000, 500000],
+                        help="Catalog sizes to benchmark (default: 5000 50000 500000)")
+    parser.add_argument("-k", type=int, default=10, help="Recommendations per query (default: 10)")
+    parser.add_argument("--queries", type=int, default=20, help="Queries timed per size and method (default: 20)")
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64",
+                        help="dtype of the similarity rows (default: float64)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the similarity rows")
+    return parser.parse_args(argv)
+
+def rank_sorted(row, movie_index, k):
+    """The previous ranking: sort every (index, score) pair, skip the first as the movie itself"""
+    scores = list(enumerate(row))
+    scores = sorted(scores, key=lambda x: x[1], reverse=True)[1:]
+    return [scores[i][0] for i in range(min(k, len(scores)))]
+
+def rank_argpartition(row, movie_index, k):
+    """The current ranking: exclude the movie by index and partially select the top k"""
+    row = np.array(row)
+    row[movie_index] = -np.inf
+    return top_k_indices(row, k)[0]
+
+def mean_latency_ms(rank, rows, movie_indices, k):
+    start = time.perf_counter()
+    for row, movie_index in zip(rows, movie_indices):
+        rank(row, movie_index, k)
+    return (time.perf_counter() - start) / len(rows) * 1000
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+
+    print(f"Per-query ranking latency, top {args.k}, {args.dtype} rows, mean of {args.queries} queries")
+    print(f"{'movies':>10}  {'old sort':>10}  {'argpartition':>12}  {'speedup':>8}")
+    for n_movies in args.sizes:
+        # A few distinct rows, reused so that generating them is not what gets measured
+        rows = rng.random((min(args.queries, 4), n_movies), dtype=args.dtype)
+        movie_indices = rng.integers(0, n_movies, size=args.queries)
+        rows = [rows[i % len(rows)] for i in range(args.queries)]
+
+        old_ms = mean_latency_ms(rank_sorted, rows, movie_indices, args.k)
+        new_ms = mean_latency_ms(rank_argpartition, rows, movie_indices, args.k)
+        print(f"{n_movies:>10,}  {old_ms:>8.2f}ms  {new_ms:>10.3f}ms  {old_ms / new_ms:>7.0f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
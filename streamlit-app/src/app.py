@@ -1,13 +1,14 @@
 # MovieFlix - AI Movie Recommender System
 # Last updated: June 14, 2025 - Fixed scikit-learn dependency issues
 
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
 # Import our custom modules
-from utils import MovieRecommender
+from utils import MovieRecommender, DATA_DIRS, DATA_FILE_COMBINATIONS, find_data_files
 from components import (
     create_netflix_header, 
     create_movie_card_netflix, 
@@ -17,6 +18,15 @@ from components import (
     create_featured_section
 )
 
+# Fitted models are cached here and reused until the CSVs or build parameters change
+ARTIFACT_DIR = Path(__file__).parent.parent / "artifacts"
+
+# Most search matches offered in the sidebar dropdown
+SEARCH_RESULT_LIMIT = 100
+
+# Memory the similarity blocks being built may use at once
+SIMILARITY_MEMORY_MB = 256
+
 # Configure Streamlit page
 st.set_page_config(
     page_title="MovieFlix - AI Movie Recommender",
@@ -475,40 +485,11 @@ st.markdown(create_search_dropdown_netflix(), unsafe_allow_html=True)
 def load_data():
     """Load data from CSV files with robust path resolution and fallback options"""
     
-    # Define possible paths for CSV files
-    possible_paths = [
-        # Streamlit Cloud path (most likely)
-        Path("/mount/src/recomender/recomender"),
-        # Alternative Streamlit Cloud paths
-        Path("/mount/src/recomender"),
-        # Local development paths
-        Path(__file__).parent.parent.parent / "recomender",
-        Path("../../../recomender"),
-        Path("../../recomender"),
-        Path("./recomender"),
-        Path("recomender"),
-    ]
-    
-    # Try different file combinations (full dataset vs sample)
-    file_combinations = [
-        ("tmdb_5000_movies.csv", "tmdb_5000_credits.csv"),  # Full dataset
-        ("sample_movies.csv", "sample_credits.csv"),        # Sample dataset
-    ]
-    
-    for data_dir in possible_paths:
-        for movies_file, credits_file in file_combinations:
-            movies_csv = data_dir / movies_file
-            credits_csv = data_dir / credits_file
-            
-            if movies_csv.exists() and credits_csv.exists():
-                # Check if files are not empty
-                try:
-                    if movies_csv.stat().st_size > 1000 and credits_csv.stat().st_size > 1000:
-                        if movies_file.startswith("sample"):
-                            st.info(f"✅ Using sample dataset ({movies_file}, {credits_file})")
-                        return str(movies_csv), str(credits_csv)
-                except Exception:
-                    continue
+    movies_csv, credits_csv = find_data_files()
+    if movies_csv and credits_csv:
+        if Path(movies_csv).name.startswith("sample"):
+            st.info(f"✅ Using sample dataset ({Path(movies_csv).name}, {Path(credits_csv).name})")
+        return movies_csv, credits_csv
     
     # If no files found, show debug information
     st.error("🔍 **Debug Information - CSV Files Not Found**")
@@ -517,9 +498,9 @@ def load_data():
     
     # Check each path with detailed info
     st.write("**Checked these paths and files:**")
-    for i, data_dir in enumerate(possible_paths, 1):
+    for i, data_dir in enumerate(DATA_DIRS, 1):
         st.write(f"{i}. `{data_dir}`")
-        for movies_file, credits_file in file_combinations:
+        for movies_file, credits_file in DATA_FILE_COMBINATIONS:
             movies_csv = data_dir / movies_file
             credits_csv = data_dir / credits_file
             st.write(f"   - {movies_file}: {movies_csv.exists()} | {credits_file}: {credits_csv.exists()}")
@@ -548,7 +529,10 @@ def load_data():
 def initialize_recommender():
     """Initialize the movie recommender system"""
     try:
-        recommender = MovieRecommender()
+        recommender = MovieRecommender(
+            similarity_backend='topk', top_k=50, dtype='float32',
+            n_jobs=os.cpu_count() or 1, memory_budget_mb=SIMILARITY_MEMORY_MB
+        )
         movies_path, credits_path = load_data()
         
         if movies_path and credits_path:
@@ -557,6 +541,12 @@ def initialize_recommender():
             with progress_container.container():
                 st.info("🔄 Initializing movie recommender system...")
                 
+                # The similarity build reports its progress row block by row block
+                progress_bar = st.progress(0.0, text="Loading movie data...")
+                recommender.progress_callback = lambda done, total: progress_bar.progress(
+                    done / total, text=f"Building similarity index: {done:,} / {total:,} movies"
+                )
+                
                 # Capture the output from the recommender
                 import io
                 import sys
@@ -568,7 +558,7 @@ def initialize_recommender():
                 
                 success = False
                 with redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
-                    success = recommender.load_and_process_data(movies_path, credits_path)
+                    success = recommender.load_or_build(movies_path, credits_path, ARTIFACT_DIR)
                 
                 # Get the captured output
                 stdout_output = stdout_buffer.getvalue()
@@ -815,13 +805,13 @@ def main():
     
     # Filter movies based on search query
     if search_query:
-        filtered_movies = [movie for movie in all_movies if search_query.lower() in movie.lower()]
+        filtered_movies = recommender.search_titles(search_query, limit=SEARCH_RESULT_LIMIT)
         if filtered_movies:
             selected_movie = st.sidebar.selectbox(
                 "",
                 options=filtered_movies,
                 key="filtered_movie_select",
-                help=f"Found {len(filtered_movies)} movies matching your search"
+                help=f"Showing the {len(filtered_movies)} best matches for your search"
             )
         else:
             st.sidebar.warning("🔍 No movies found matching your search. Try a different term.")
@@ -0,0 +1,164 @@
+# MovieFlix - precompute the full recommendation table
+#
+# Builds a MovieRecommender from the same CSVs the Streamlit app finds, computes
+# the top-K recommendations of every movie and writes them to Parquet, Arrow
+# (Feather) or SQLite, so a serving layer can answer with a plain key lookup.
+# Peak memory of the similarity build is reported by the recommender itself;
+# peak RSS of the whole run is reported at the end.
+#
+#   python src/precompute.py --output recommendations.sqlite -k 20 --jobs 4
+
+import argparse
+import importlib.util
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils import MovieRecommender, find_data_files
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Output suffixes and the packages pandas can write them with (any one will do)
+OUTPUT_FORMATS = {
+    ".parquet": ("pyarrow", "fastparquet"),
+    ".arrow": ("pyarrow",),
+    ".feather": ("pyarrow",),
+    ".sqlite": (),
+    ".db": (),
+}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Precompute top-K movie recommendations for the whole catalog"
+    )
+    parser.add_argument("--movies", help="Movies CSV (default: same lookup as the app)")
+    parser.add_argument("--credits", help="Credits CSV (default: same lookup as the app)")
+    parser.add_argument(
+        "--output", "-o", required=True,
+        help="Output file: .parquet, .arrow/.feather (these need pyarrow) or .sqlite/.db"
+    )
+    parser.add_argument("-k", type=int, default=10, help="Recommendations per movie (default: 10)")
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=os.cpu_count() or 1,
+        help="Threads used over row blocks (default: all cores)"
+    )
+    parser.add_argument("--block-size", type=int, default=512, help="Rows per similarity block")
+    parser.add_argument(
+        "--rating-weight", type=float, default=0.0,
+        help="Weight of the rating prior in the hybrid score, as in the app (default: 0)"
+    )
+    parser.add_argument(
+        "--popularity-weight", type=float, default=0.0,
+        help="Weight of the popularity prior in the hybrid score, as in the app (default: 0)"
+    )
+    parser.add_argument(
+        "--memory-budget-mb", type=float,
+        help="Memory for the similarity blocks in flight; overrides --block-size"
+    )
+    args = parser.parse_args(argv)
+
+    # Reject an unusable output before spending the build on it
+    suffix = Path(args.output).suffix.lower()
+    if suffix not in OUTPUT_FORMATS:
+        parser.error(f"unsupported output format: {suffix or args.output} "
+                     f"(use {', '.join(OUTPUT_FORMATS)})")
+    writers = OUTPUT_FORMATS[suffix]
+    if writers and not any(importlib.util.find_spec(name) for name in writers):
+        parser.error(f"writing {suffix} files needs {' or '.join(writers)}; install it or use .sqlite/.db")
+    return args
+
+def recommendation_table(recommender, k):
+    """Long table with one row per (seed movie, rank)"""
+    n_movies = len(recommender.movie_titles)
+    k = max(0, min(k, recommender.top_k, n_movies - 1))
+
+    # Re-ranked by the recommender's score prior, as get_recommendations does
+    seed_rows = np.arange(n_movies)
+    indices, scores = recommender.stored_neighbors(seed_rows, k)
+    indices, scores = indices.ravel(), scores.ravel()
+    # Empty neighbor slots are marked -1
+    filled = indices >= 0
+
+    titles = np.asarray(recommender.movie_titles, dtype=object)
+    movie_ids = np.asarray(recommender.movie_ids)
+    return pd.DataFrame({
+        'seed_id': np.repeat(movie_ids[seed_rows], k)[filled],
+        'seed_title': np.repeat(titles[seed_rows], k)[filled],
+        'rank': np.tile(np.arange(1, k + 1, dtype=np.int16), n_movies)[filled],
+        'movie_id': movie_ids[indices[filled]],
+        'title': titles[indices[filled]],
+        'similarity_score': scores[filled],
+    })
+
+def write_table(table, output):
+    """Write the table in the format implied by the output extension"""
+    suffix = output.suffix.lower()
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    if suffix == ".parquet":
+        table.to_parquet(output, index=False)
+    elif suffix in (".arrow", ".feather"):
+        table.to_feather(output)
+    elif suffix in (".sqlite", ".db"):
+        if output.exists():
+            output.unlink()
+        with sqlite3.connect(output) as conn:
+            table.to_sql("recommendations", conn, index=False)
+            conn.execute("CREATE INDEX idx_recommendations_seed ON recommendations (seed_title, rank)")
+    else:
+        raise ValueError(f"Unsupported output format: {suffix} (use .parquet, .arrow, .feather, .sqlite or .db)")
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    movies_path, credits_path = args.movies, args.credits
+    if not (movies_path and credits_path):
+        movies_path, credits_path = find_data_files()
+    if not (movies_path and credits_path):
+        print("❌ Could not find the movies/credits CSV files; pass --movies and --credits")
+        return 1
+
+    start_time = time.perf_counter()
+
+    # With a score prior the k best are re-ranked from the app's default top-50 lists
+    weighted = args.rating_weight or args.popularity_weight
+    recommender = MovieRecommender(
+        similarity_backend='topk', top_k=max(args.k, 50) if weighted else args.k,
+        block_size=args.block_size, n_jobs=args.jobs, memory_budget_mb=args.memory_budget_mb,
+        rating_weight=args.rating_weight, popularity_weight=args.popularity_weight
+    )
+    if not recommender.load_and_process_data(movies_path, credits_path):
+        print("❌ Failed to build the recommender")
+        return 1
+    build_time = time.perf_counter() - start_time
+
+    table = recommendation_table(recommender, args.k)
+    output = Path(args.output)
+    try:
+        write_table(table, output)
+    except (ImportError, ValueError) as e:
+        print(f"❌ Could not write {output}: {e}")
+        return 1
+    total_time = time.perf_counter() - start_time
+
+    n_movies = len(recommender.movie_titles)
+    print(f"✅ Wrote {len(table):,} recommendations for {n_movies:,} movies to {output}")
+    print(f"Build: {build_time:.2f}s, total: {total_time:.2f}s, "
+          f"{n_movies / total_time:,.0f} movies/s, {len(table) / total_time:,.0f} rows/s")
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        max_rss_mb = max_rss / 1024 ** 2 if sys.platform == "darwin" else max_rss / 1024
+        print(f"Peak RSS: {max_rss_mb:.1f} MB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
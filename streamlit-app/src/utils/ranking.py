@@ -0,0 +1,33 @@
+"""Top-k selection over score arrays"""
+
+import numpy as np
+
+def top_k_indices(scores, k):
+    """Indices and values of the k largest entries along the last axis, in descending order.
+    
+    Uses argpartition for the O(N) selection and only sorts the k survivors.
+    Entries equal to -inf are never selected, so callers exclude items by
+    setting their score to -inf. A 1-D result is shortened accordingly; in the
+    2-D case every row keeps k slots and those without a selectable entry get
+    index -1 (and score -inf).
+    """
+    scores = np.asarray(scores)
+    n = scores.shape[-1]
+    k = max(0, min(k, n))
+    
+    if k == 0:
+        top = np.empty(scores.shape[:-1] + (0,), dtype=np.intp)
+    elif k < n:
+        top = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        top = np.broadcast_to(np.arange(n), scores.shape).copy()
+    
+    top_scores = np.take_along_axis(scores, top, axis=-1)
+    order = np.argsort(-top_scores, axis=-1, kind='stable')
+    top = np.take_along_axis(top, order, axis=-1)
+    top_scores = np.take_along_axis(top_scores, order, axis=-1)
+    
+    keep = top_scores > -np.inf
+    if scores.ndim == 1:
+        return top[keep], top_scores[keep]
+    return np.where(keep, top, -1), top_scores
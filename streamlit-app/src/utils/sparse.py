@@ -0,0 +1,295 @@
+"""NumPy-only sparse matrix and TF-IDF vectorizer used when scikit-learn is not installed"""
+
+import re
+
+import numpy as np
+
+# scikit-learn's English stop word list, used by the fallback vectorizer
+ENGLISH_STOP_WORDS = frozenset("""
+a about above across after afterwards again against all almost alone along already also
+although always am among amongst amoungst amount an and another any anyhow anyone
+anything anyway anywhere are around as at back be became because become becomes becoming
+been before beforehand behind being below beside besides between beyond bill both bottom
+but by call can cannot cant co con could couldnt cry de describe detail do done down due
+during each eg eight either eleven else elsewhere empty enough etc even ever every
+everyone everything everywhere except few fifteen fifty fill find fire first five for
+former formerly forty found four from front full further get give go had has hasnt have
+he hence her here hereafter hereby herein hereupon hers herself him himself his how
+however hundred i ie if in inc indeed interest into is it its itself keep last latter
+latterly least less ltd made many may me meanwhile might mill mine more moreover most
+mostly move much must my myself name namely neither never nevertheless next nine no
+nobody none noone nor not nothing now nowhere of off often on once one only onto or
+other others otherwise our ours ourselves out over own part per perhaps please put
+rather re same see seem seemed seeming seems serious several she should show side since
+sincere six sixty so some somehow someone something sometime sometimes somewhere still
+such system take ten than that the their them themselves then thence there thereafter
+thereby therefore therein thereupon these they thick thin third this those though three
+through throughout thru thus to together too top toward towards twelve twenty two un
+under until up upon us very via was we well were what whatever when whence whenever
+where whereafter whereas whereby wherein whereupon wherever whether which while whither
+who whoever whole whom whose why will with within without would yet you your yours
+yourself yourselves
+""".split())
+
+class CSRMatrix:
+    """Minimal NumPy-only CSR matrix produced by the fallback TF-IDF engine.
+    
+    Row products are computed through a lazily built column (inverted) index,
+    so the cost of ``dot_rows`` is proportional to the postings touched rather
+    than to the size of the matrix. Columns present in a large share of rows
+    (where postings cost more than a dense product) are kept as a small dense
+    block and multiplied with BLAS instead.
+    """
+    
+    # Upper bound on postings gathered at once by dot_rows
+    MAX_GATHER = 1 << 22
+    # Columns in more than this fraction of rows go to the dense block...
+    DENSE_COLUMN_FRACTION = 1 / 16
+    # ...as long as the block stays under this many bytes
+    MAX_DENSE_BYTES = 64 << 20
+    
+    def __init__(self, data, indices, indptr, shape):
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.shape = tuple(shape)
+        self._columns = None
+    
+    @property
+    def dtype(self):
+        return self.data.dtype
+    
+    @property
+    def nnz(self):
+        return len(self.data)
+    
+    def __getitem__(self, rows):
+        """Row selection by slice (step 1) or integer array"""
+        if isinstance(rows, slice):
+            start, stop, step = rows.indices(self.shape[0])
+            if step != 1:
+                raise ValueError("CSRMatrix only supports contiguous row slices")
+            lo, hi = self.indptr[start], self.indptr[max(start, stop)]
+            return CSRMatrix(
+                self.data[lo:hi], self.indices[lo:hi],
+                self.indptr[start:max(start, stop) + 1] - lo, (max(0, stop - start), self.shape[1])
+            )
+        
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        lengths = self.indptr[rows + 1] - self.indptr[rows]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        positions = np.repeat(self.indptr[rows] - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return CSRMatrix(self.data[positions], self.indices[positions], indptr, (len(rows), self.shape[1]))
+    
+    def transpose(self):
+        """The transposed matrix as a new CSRMatrix"""
+        n_rows, n_cols = self.shape
+        rows = np.repeat(np.arange(n_rows, dtype=np.int32), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind='stable')
+        indptr = np.zeros(n_cols + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=n_cols), out=indptr[1:])
+        return CSRMatrix(self.data[order], rows[order], indptr, (n_cols, n_rows))
+    
+    def toarray(self):
+        dense = np.zeros(self.shape, dtype=self.dtype)
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        dense[rows, self.indices] = self.data
+        return dense
+    
+    def dot_dense(self, dense, max_gather=1 << 16):
+        """``self @ dense`` for a dense (n_cols, d) array.
+        
+        Works in row chunks of about ``max_gather`` products; small chunks keep the
+        intermediate products cache-resident, which is ~3x faster than large ones.
+        """
+        n_rows = self.shape[0]
+        result = np.zeros((n_rows, dense.shape[1]), dtype=np.result_type(self.dtype, dense.dtype))
+        row_lengths = np.diff(self.indptr)
+        chunk_rows = max(1, max_gather // max(1, dense.shape[1] * max(1, int(row_lengths.mean() if n_rows else 1))))
+        
+        for start in range(0, n_rows, chunk_rows):
+            stop = min(start + chunk_rows, n_rows)
+            lo, hi = self.indptr[start], self.indptr[stop]
+            if lo == hi:
+                continue
+            products = self.data[lo:hi, np.newaxis] * dense[self.indices[lo:hi]]
+            # reduceat needs non-empty segments; empty rows stay zero
+            nonempty = row_lengths[start:stop] > 0
+            result[start:stop][nonempty] = np.add.reduceat(
+                products, self.indptr[start:stop][nonempty] - lo, axis=0
+            )
+        return result
+    
+    def _column_index(self):
+        """Split the columns into a dense block of frequent columns and a CSC inverted index of the rest.
+        
+        Returns ``(dense_slot, dense_block, col_indptr, col_rows, col_data)`` where
+        ``dense_slot[c]`` is the position of column ``c`` in ``dense_block`` or -1,
+        and the CSC arrays hold only the remaining columns.
+        """
+        if self._columns is None:
+            n_rows, n_cols = self.shape
+            rows = np.repeat(np.arange(n_rows, dtype=np.int64), np.diff(self.indptr))
+            counts = np.bincount(self.indices, minlength=n_cols)
+            
+            max_dense = self.MAX_DENSE_BYTES // max(1, n_rows * self.dtype.itemsize)
+            frequent = np.flatnonzero(counts > n_rows * self.DENSE_COLUMN_FRACTION)
+            frequent = frequent[np.argsort(-counts[frequent], kind='stable')][:max_dense]
+            dense_slot = np.full(n_cols, -1, dtype=np.int64)
+            dense_slot[frequent] = np.arange(len(frequent))
+            
+            in_dense = dense_slot[self.indices] >= 0
+            dense_block = np.zeros((n_rows, len(frequent)), dtype=self.dtype)
+            dense_block[rows[in_dense], dense_slot[self.indices[in_dense]]] = self.data[in_dense]
+            
+            sparse = ~in_dense
+            order = np.argsort(self.indices[sparse], kind='stable')
+            counts[frequent] = 0
+            col_indptr = np.zeros(n_cols + 1, dtype=np.int64)
+            np.cumsum(counts, out=col_indptr[1:])
+            self._columns = (dense_slot, dense_block, col_indptr,
+                             rows[sparse][order], self.data[sparse][order])
+        return self._columns
+    
+    def dot_rows(self, rows):
+        """Dense ``rows @ self.T`` for a CSRMatrix of query rows with the same columns"""
+        dense_slot, dense_block, col_indptr, col_rows, col_data = self._column_index()
+        n_queries, n_rows = rows.shape[0], self.shape[0]
+        
+        entry_rows = np.repeat(np.arange(n_queries, dtype=np.int64), np.diff(rows.indptr))
+        slots = dense_slot[rows.indices]
+        in_dense = slots >= 0
+        
+        # Frequent columns: one small dense GEMM
+        query_block = np.zeros((n_queries, dense_block.shape[1]), dtype=dense_block.dtype)
+        query_block[entry_rows[in_dense], slots[in_dense]] = rows.data[in_dense]
+        result = (query_block @ dense_block.T).astype(np.result_type(rows.dtype, self.dtype))
+        
+        # Remaining columns: walk their postings
+        entry_rows = entry_rows[~in_dense]
+        query_cols = rows.indices[~in_dense]
+        query_data = rows.data[~in_dense]
+        lengths = col_indptr[query_cols + 1] - col_indptr[query_cols]
+        ends = np.cumsum(lengths)
+        
+        # Gather postings in bounded chunks of query entries
+        start = 0
+        while start < len(lengths):
+            stop = max(start + 1, int(np.searchsorted(ends, ends[start] - lengths[start] + self.MAX_GATHER)))
+            chunk_lengths = lengths[start:stop]
+            total = int(chunk_lengths.sum())
+            if total:
+                shifts = col_indptr[query_cols[start:stop]] - (np.cumsum(chunk_lengths) - chunk_lengths)
+                positions = np.arange(total) + np.repeat(shifts, chunk_lengths)
+                
+                first, last = entry_rows[start], entry_rows[stop - 1]
+                targets = (np.repeat(entry_rows[start:stop] - first, chunk_lengths) * n_rows
+                           + col_rows[positions])
+                weights = np.repeat(query_data[start:stop], chunk_lengths) * col_data[positions]
+                result[first:last + 1] += np.bincount(
+                    targets, weights=weights, minlength=(last - first + 1) * n_rows
+                ).reshape(last - first + 1, n_rows)
+            start = stop
+        
+        return result
+
+class SimpleTfidfVectorizer:
+    """NumPy-only TF-IDF vectorizer mirroring scikit-learn's defaults.
+    
+    Tokenizes each document once with scikit-learn's token pattern, codes terms
+    as integers, and assembles the counts as COO triples that are reduced into a
+    CSRMatrix. Applies smoothed idf weighting and L2 row normalization, so its
+    output matches ``sklearn.feature_extraction.text.TfidfVectorizer`` with the
+    same max_features/stop_words settings.
+    """
+    
+    TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+    
+    def __init__(self, max_features=None, stop_words=None, vocabulary=None, dtype=np.float64,
+                 analyzer='word', **kwargs):
+        self.max_features = max_features
+        self.stop_words = ENGLISH_STOP_WORDS if stop_words == 'english' else frozenset(stop_words or ())
+        self.dtype = np.dtype(dtype)
+        self.analyzer = analyzer
+        self.vocabulary_ = dict(vocabulary) if vocabulary is not None else None
+        self.idf_ = None
+    
+    def build_analyzer(self):
+        """Callable that turns a document into its list of tokens, as scikit-learn's"""
+        if callable(self.analyzer):
+            return self.analyzer
+        stop_words = self.stop_words
+        findall = self.TOKEN_PATTERN.findall
+        return lambda text: [token for token in findall(str(text).lower()) if token not in stop_words]
+    
+    def _term_ids(self, texts, vocabulary, grow):
+        """Tokenize every document once; return term ids and per-document token counts"""
+        analyze = self.build_analyzer()
+        term_ids = []
+        lengths = []
+        
+        for text in texts:
+            tokens = analyze(text)
+            if grow:
+                ids = [vocabulary.setdefault(token, len(vocabulary)) for token in tokens]
+            else:
+                ids = [vocabulary[token] for token in tokens if token in vocabulary]
+            term_ids.extend(ids)
+            lengths.append(len(ids))
+        
+        return np.array(term_ids, dtype=np.int64), np.array(lengths, dtype=np.int64)
+    
+    def _weighted_matrix(self, term_ids, lengths, n_features):
+        """COO (document, term) counts -> idf-weighted, L2-normalized CSRMatrix"""
+        n_docs = len(lengths)
+        docs = np.repeat(np.arange(n_docs, dtype=np.int64), lengths)
+        keys, counts = np.unique(docs * n_features + term_ids, return_counts=True)
+        rows = keys // n_features
+        cols = (keys % n_features).astype(np.int32)
+        
+        data = counts * self.idf_[cols]
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=n_docs))
+        norms[norms == 0] = 1
+        data = (data / norms[rows]).astype(self.dtype)
+        
+        indptr = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_docs), out=indptr[1:])
+        return CSRMatrix(data, cols, indptr, (n_docs, n_features))
+    
+    def fit_transform(self, texts):
+        vocabulary = {}
+        term_ids, lengths = self._term_ids(texts, vocabulary, grow=True)
+        terms = np.array(list(vocabulary), dtype=object)
+        
+        # Keep the max_features most frequent terms, numbered alphabetically. Ties are
+        # broken by the same (default, unstable) argsort over alphabetically ordered
+        # totals that scikit-learn uses, so both pick the same vocabulary.
+        alphabetical = np.argsort(terms.astype(str), kind='stable')
+        totals = np.bincount(term_ids, minlength=len(terms))
+        keep = alphabetical[np.argsort(-totals[alphabetical])]
+        if self.max_features is not None:
+            keep = keep[:self.max_features]
+        keep = keep[np.argsort(terms[keep].astype(str), kind='stable')]
+        
+        remap = np.full(len(terms), -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+        docs = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        term_ids = remap[term_ids]
+        kept = term_ids >= 0
+        docs, term_ids = docs[kept], term_ids[kept]
+        lengths = np.bincount(docs, minlength=len(lengths))
+        
+        self.vocabulary_ = {term: i for i, term in enumerate(terms[keep].tolist())}
+        n_features = len(keep)
+        
+        # Smoothed idf, as scikit-learn: ln((1 + n) / (1 + df)) + 1
+        present = np.unique(docs * n_features + term_ids) % n_features
+        df = np.bincount(present, minlength=n_features)
+        self.idf_ = np.log((1 + len(lengths)) / (1 + df)) + 1
+        
+        return self._weighted_matrix(term_ids, lengths, n_features)
+    
+    def transform(self, texts):
+        term_ids, lengths = self._term_ids(texts, self.vocabulary_, grow=False)
+        return self._weighted_matrix(term_ids, lengths, len(self.vocabulary_))
@@ -0,0 +1,248 @@
+"""Substring and typo-tolerant search over movie titles"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+
+from .ranking import top_k_indices
+
+def normalize_title(text):
+    """Case-fold, strip accents and collapse whitespace, e.g. ' Amélie  ' -> 'amelie'"""
+    text = str(text)
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.casefold().split())
+
+def _code_points(text):
+    """Unicode code points of a string as a uint32 array"""
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+def _trigram_codes(points):
+    """int64 code of every trigram of a code point array (21 bits per code point)"""
+    points = points.astype(np.int64)
+    return (points[:-2] << 42) | (points[1:-1] << 21) | points[2:]
+
+def _trigram_postings(texts):
+    """CSR-style trigram posting lists of a list of NUL-free strings.
+    
+    Returns ``(codes, indptr, rows)``: the sorted distinct trigram codes, and
+    for trigram ``codes[g]`` the ascending row numbers of the texts containing
+    it in ``rows[indptr[g]:indptr[g + 1]]``. Built with array operations over
+    one code point array of all texts.
+    """
+    # All texts as one code point array, each followed by a NUL separator
+    lengths = np.array([len(text) + 1 for text in texts], dtype=np.int64)
+    points = _code_points('\0'.join(list(texts) + ['']))
+    rows = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+    codes = _trigram_codes(points)
+    valid = (points[:-2] != 0) & (points[1:-1] != 0) & (points[2:] != 0)
+    codes, rows = codes[valid], rows[:-2][valid]
+    
+    # Sort by (trigram, row) and drop repeats of a trigram within a text
+    order = np.lexsort((rows, codes))
+    codes, rows = codes[order], rows[order]
+    first = np.ones(len(codes), dtype=bool)
+    first[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+    codes, rows = codes[first], rows[first]
+    
+    codes, starts = np.unique(codes, return_index=True)
+    return codes, np.append(starts, len(rows)), rows
+
+class TitleSearchIndex:
+    """Substring search over titles with prefix-first ranking.
+    
+    Titles are normalized once at build time. Matches are ranked in three tiers,
+    each only consulted while fewer than ``limit`` results have been found:
+    titles starting with the query (binary search over the sorted titles), then
+    titles with a word starting with the query (binary search over the sorted
+    word suffixes), then any other substring match (trigram posting lists
+    intersected rarest first, verified against the title, earlier and shorter
+    matches first). Queries shorter than a trigram only use the first two tiers.
+    
+    The trigram posting lists come from _trigram_postings.
+    """
+    
+    NGRAM = 3
+    WORD_START = re.compile(r'(?<=\W)\w')
+    
+    def __init__(self, titles):
+        self.titles = list(titles)
+        self.normalized = [normalize_title(title) for title in self.titles]
+        
+        self._title_rows = sorted(range(len(self.normalized)), key=self.normalized.__getitem__)
+        self._sorted_titles = [self.normalized[i] for i in self._title_rows]
+        
+        word_suffixes = []
+        for i, text in enumerate(self.normalized):
+            for match in self.WORD_START.finditer(text):
+                word_suffixes.append((text[match.start():], i))
+        word_suffixes.sort()
+        self._word_suffixes = [suffix for suffix, _ in word_suffixes]
+        self._word_rows = [i for _, i in word_suffixes]
+        
+        self._gram_codes, self._gram_indptr, self._gram_rows = _trigram_postings(self.normalized)
+    
+    def __len__(self):
+        return len(self.titles)
+    
+    @staticmethod
+    def _prefix_scan(keys, rows, query, limit, results, seen):
+        """Append rows whose key starts with `query` (keys sorted) until `limit` results are held"""
+        for position in range(bisect_left(keys, query), len(keys)):
+            if len(results) >= limit or not keys[position].startswith(query):
+                break
+            row = rows[position]
+            if row not in seen:
+                seen.add(row)
+                results.append(row)
+    
+    def _substring_rows(self, query):
+        """Rows containing every trigram of the query"""
+        codes = np.unique(_trigram_codes(_code_points(query)))
+        slots = np.searchsorted(self._gram_codes, codes)
+        if np.any(slots >= len(self._gram_codes)) or np.any(self._gram_codes[slots] != codes):
+            return np.empty(0, dtype=np.int64)
+        
+        lists = sorted((self._gram_rows[self._gram_indptr[slot]:self._gram_indptr[slot + 1]]
+                        for slot in slots.tolist()), key=len)
+        rows = lists[0]
+        for other in lists[1:]:
+            if len(rows) == 0:
+                break
+            rows = rows[np.isin(rows, other, assume_unique=True)]
+        return rows
+    
+    def search(self, query, limit=50):
+        """Row positions of the titles matching `query`, best first, at most `limit`"""
+        query = normalize_title(query)
+        if not query or limit <= 0:
+            return []
+        
+        results = []
+        seen = set()
+        self._prefix_scan(self._sorted_titles, self._title_rows, query, limit, results, seen)
+        self._prefix_scan(self._word_suffixes, self._word_rows, query, limit, results, seen)
+        
+        if len(results) < limit and len(query) >= self.NGRAM:
+            matches = []
+            for row in self._substring_rows(query).tolist():
+                if row in seen:
+                    continue
+                position = self.normalized[row].find(query)
+                if position >= 0:
+                    matches.append((position, len(self.normalized[row]), self.normalized[row], row))
+            matches.sort()
+            results.extend(row for *_, row in matches[:limit - len(results)])
+        return results
+
+def _substring_edit_distance(pattern, texts):
+    """Smallest Levenshtein distance between `pattern` (at most 64 characters) and any substring of each text.
+    
+    Myers' bit-parallel algorithm in its search form, vectorized over the texts:
+    one pass over the longest text's positions, each a handful of uint64 array
+    operations, instead of a dynamic-programming table per text.
+    """
+    m = len(pattern)
+    lengths = np.array([len(text) for text in texts], dtype=np.int64)
+    if m == 0 or len(texts) == 0:
+        return np.zeros(len(texts), dtype=np.int64)
+    
+    points = np.zeros((len(texts), lengths.max(initial=0)), dtype=np.uint32)
+    for i, text in enumerate(texts):
+        points[i, :len(text)] = _code_points(text)
+    
+    # Bit i of masks[c] is set where pattern[i] is chars[c]
+    chars = np.unique(_code_points(pattern))
+    masks = np.zeros(len(chars), dtype=np.uint64)
+    for position, char in enumerate(pattern):
+        masks[np.searchsorted(chars, ord(char))] |= np.uint64(1) << np.uint64(position)
+    
+    one = np.uint64(1)
+    high = one << np.uint64(m - 1)
+    pv = np.full(len(texts), ~np.uint64(0), dtype=np.uint64)
+    mv = np.zeros(len(texts), dtype=np.uint64)
+    score = np.full(len(texts), m, dtype=np.int64)
+    best = score.copy()
+    
+    for j in range(points.shape[1]):
+        column = points[:, j]
+        slot = np.minimum(np.searchsorted(chars, column), len(chars) - 1)
+        eq = np.where(chars[slot] == column, masks[slot], np.uint64(0))
+        
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        score += (ph & high != 0).astype(np.int64) - (mh & high != 0).astype(np.int64)
+        
+        # No carry into the lowest bit: a match may start anywhere in the text
+        ph <<= one
+        mh <<= one
+        pv = mh | ~(xv | ph)
+        mv = ph & xv
+        best = np.where(j < lengths, np.minimum(best, score), best)
+    return best
+
+def _fuzzy_key(text):
+    """A title reduced to its normalized words, e.g. "At World's End" -> 'at world s end'"""
+    return ' '.join(re.findall(r'\w+', normalize_title(text)))
+
+class FuzzyTitleIndex:
+    """Typo-tolerant title lookup with confidence scores.
+    
+    Titles are reduced to their words (_fuzzy_key) and indexed by the trigrams
+    of the space-padded key. The candidates for a query are the MAX_CANDIDATES
+    titles sharing the largest share of trigrams with it (Dice coefficient).
+    Each candidate is verified by the smallest edit distance between the query
+    and any part of its title, and dropped when that exceeds ``max_distance``
+    (by default a quarter of the query length). The confidence is
+    ``(1 - distance / len(query)) * (0.5 + 0.5 * coverage)``, where coverage is
+    the share of the title spanned by the query: an exact title scores 1, a
+    correct but partial one ("pirates of the caribbean") less.
+    """
+    
+    MAX_CANDIDATES = 64
+    MAX_QUERY_LENGTH = 64  # Bit vectors of the edit distance are one uint64 wide
+    
+    def __init__(self, titles):
+        self.titles = list(titles)
+        self.keys = [_fuzzy_key(title) for title in self.titles]
+        self._gram_codes, self._gram_indptr, self._gram_rows = _trigram_postings(
+            [f' {key} ' for key in self.keys]
+        )
+        self._gram_counts = np.bincount(self._gram_rows, minlength=len(self.keys))
+    
+    def __len__(self):
+        return len(self.titles)
+    
+    def match(self, query, limit=5, max_distance=None):
+        """Up to `limit` (row, confidence, distance) tuples for `query`, most confident first"""
+        key = _fuzzy_key(query)[:self.MAX_QUERY_LENGTH]
+        if not key or not self.keys or limit <= 0:
+            return []
+        
+        codes = np.unique(_trigram_codes(_code_points(f' {key} ')))
+        slots = np.minimum(np.searchsorted(self._gram_codes, codes), len(self._gram_codes) - 1)
+        slots = slots[self._gram_codes[slots] == codes]
+        if len(slots) == 0:
+            return []
+        
+        rows = np.concatenate([self._gram_rows[self._gram_indptr[slot]:self._gram_indptr[slot + 1]]
+                               for slot in slots.tolist()])
+        shared = np.bincount(rows, minlength=len(self.keys))
+        dice = np.where(shared > 0, 2 * shared / (len(codes) + self._gram_counts), -np.inf)
+        candidates, _ = top_k_indices(dice, self.MAX_CANDIDATES)
+        
+        distances = _substring_edit_distance(key, [self.keys[row] for row in candidates])
+        if max_distance is None:
+            max_distance = max(1, len(key) // 4)
+        lengths = np.array([len(self.keys[row]) for row in candidates], dtype=np.float64)
+        coverage = np.minimum(1.0, len(key) / np.maximum(lengths, 1))
+        confidence = (1 - distances / len(key)) * (0.5 + 0.5 * coverage)
+        
+        keep = np.flatnonzero(distances <= max_distance)
+        keep = keep[np.lexsort((lengths[keep], -confidence[keep]))][:limit]
+        return [(int(candidates[i]), float(confidence[i]), int(distances[i])) for i in keep]
@@ -0,0 +1,36 @@
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# The app imports `utils` from src/, so the tests do too
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+SAMPLE_MOVIES = Path(__file__).resolve().parents[2] / "recomender" / "sample_movies.csv"
+
+@pytest.fixture(scope="session")
+def sample_csvs(tmp_path_factory):
+    """Paths of the sample movies CSV and of a small synthetic credits CSV for it.
+
+    The credits are deterministic: cast and directors are drawn from small
+    pools, so that movies share names the way real credits do.
+    """
+    if not SAMPLE_MOVIES.exists():
+        pytest.skip(f"{SAMPLE_MOVIES} not found")
+
+    movies = pd.read_csv(SAMPLE_MOVIES, usecols=["id", "title"])
+    rows = []
+    for i, (movie_id, title) in enumerate(zip(movies["id"], movies["title"])):
+        cast = [{"name": f"Actor {(i * 7 + j * 13) % 97}", "order": j} for j in range(4)]
+        crew = [
+            {"name": f"Director {i % 41}", "job": "Director"},
+            {"name": f"Writer {i % 53}", "job": "Writer"},
+        ]
+        rows.append({"movie_id": movie_id, "title": title, "cast": json.dumps(cast), "crew": json.dumps(crew)})
+
+    credits_csv = tmp_path_factory.mktemp("data") / "sample_credits.csv"
+    pd.DataFrame(rows).to_csv(credits_csv, index=False)
+    return str(SAMPLE_MOVIES), str(credits_csv)
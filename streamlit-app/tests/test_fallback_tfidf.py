@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from utils import CSRMatrix, MovieRecommender, SimpleTfidfVectorizer, build_topk_neighbors
+
+sklearn_text = pytest.importorskip("sklearn.feature_extraction.text")
+
+K = 10
+
+@pytest.fixture(scope="module")
+def documents(sample_csvs):
+    """Cleaned combined-feature documents of the sample catalog"""
+    recommender = MovieRecommender(similarity_backend="ann")
+    assert recommender.load_and_process_data(*sample_csvs)
+    return recommender.documents
+
+@pytest.fixture(scope="module")
+def matrices(documents):
+    """(fallback, scikit-learn) vectorizers and TF-IDF matrices fitted on the same documents"""
+    fallback = SimpleTfidfVectorizer(max_features=5000, stop_words="english")
+    reference = sklearn_text.TfidfVectorizer(max_features=5000, stop_words="english")
+    return fallback, fallback.fit_transform(documents), reference, reference.fit_transform(documents)
+
+def test_fallback_matches_sklearn_tfidf(matrices):
+    fallback, matrix, reference, reference_matrix = matrices
+    assert isinstance(matrix, CSRMatrix)
+    assert fallback.vocabulary_ == reference.vocabulary_
+    np.testing.assert_allclose(fallback.idf_, reference.idf_, rtol=1e-12)
+    np.testing.assert_allclose(matrix.toarray(), reference_matrix.toarray(), atol=1e-12)
+
+def test_fallback_transform_matches_sklearn(matrices, documents):
+    fallback, _, reference, _ = matrices
+    queries = documents[:20] + ["space pirates with a strong woman lead", ""]
+    np.testing.assert_allclose(fallback.transform(queries).toarray(),
+                               reference.transform(queries).toarray(), atol=1e-12)
+
+def test_fallback_row_products_match_dense(matrices):
+    _, matrix, _, _ = matrices
+    rows = np.arange(0, matrix.shape[0], 7)
+    dense = matrix.toarray()
+    np.testing.assert_allclose(matrix.dot_rows(matrix[rows]), dense[rows] @ dense.T, atol=1e-12)
+
+def test_fallback_top_k_neighbors_match_sklearn(matrices):
+    _, matrix, _, reference_matrix = matrices
+    _, indices, scores = build_topk_neighbors(matrix, K)
+    _, reference_indices, reference_scores = build_topk_neighbors(reference_matrix, K)
+    np.testing.assert_array_equal(indices, reference_indices)
+    np.testing.assert_allclose(scores, reference_scores, atol=1e-6)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from utils import MovieRecommender, SimpleTfidfVectorizer, build_topk_neighbors
+
+K = 10
+# float32 keeps ~7 significant digits; cosines of unit vectors agree to well below this
+TOLERANCE = 1e-5
+
+def exact_similarities(feature_matrix):
+    """Dense float64 cosine similarities of a row-normalized scipy.sparse matrix or CSRMatrix"""
+    dense = feature_matrix.toarray().astype(np.float64)
+    return dense @ dense.T
+
+def assert_same_rankings(indices, scores, reference_scores, exact):
+    """Top-K lists agree with the reference within TOLERANCE.
+
+    Scores must match rank by rank, and each picked movie's exact similarity
+    must equal the reference score at its rank: movies may only swap places
+    with movies whose similarity is tied within the tolerance.
+    """
+    np.testing.assert_allclose(scores, reference_scores, atol=TOLERANCE)
+    seeds = np.arange(len(indices))[:, np.newaxis]
+    np.testing.assert_allclose(exact[seeds, indices], reference_scores, atol=TOLERANCE)
+    assert (indices != seeds).all()
+
+@pytest.fixture(scope="module")
+def recommenders(sample_csvs):
+    """Recommenders built in float32 and float64, per similarity backend"""
+    built = {}
+    for backend in ("dense", "topk"):
+        for dtype in ("float32", "float64"):
+            recommender = MovieRecommender(similarity_backend=backend, top_k=K, dtype=dtype)
+            assert recommender.load_and_process_data(*sample_csvs)
+            built[backend, dtype] = recommender
+    return built
+
+@pytest.mark.parametrize("backend", ["dense", "topk"])
+def test_float32_top_k_matches_float64(recommenders, backend):
+    single, double = recommenders[backend, "float32"], recommenders[backend, "float64"]
+    assert single.movie_titles == double.movie_titles
+
+    _, indices, scores = single.get_recommendations_batch(single.movie_titles, K, as_frame=False)
+    _, _, reference_scores = double.get_recommendations_batch(double.movie_titles, K, as_frame=False)
+    assert_same_rankings(indices, scores, reference_scores, exact_similarities(double.feature_matrix))
+
+def test_float32_halves_the_stored_arrays(recommenders):
+    single, double = recommenders["dense", "float32"], recommenders["dense", "float64"]
+    assert single.feature_matrix.dtype == np.float32
+    assert single.similarity_matrix.dtype == np.float32
+    assert single.similarity_matrix.nbytes * 2 == double.similarity_matrix.nbytes
+    assert single.feature_matrix.data.nbytes * 2 == double.feature_matrix.data.nbytes
+
+def test_fallback_float32_top_k_matches_float64(recommenders):
+    documents = recommenders["dense", "float64"].documents
+    neighbors = {}
+    for dtype in (np.float32, np.float64):
+        matrix = SimpleTfidfVectorizer(max_features=5000, stop_words="english", dtype=dtype).fit_transform(documents)
+        assert matrix.dtype == dtype
+        _, indices, scores = build_topk_neighbors(matrix, K)
+        neighbors[dtype] = (indices.reshape(-1, K), scores.reshape(-1, K), matrix)
+
+    indices, scores, _ = neighbors[np.float32]
+    _, reference_scores, reference_matrix = neighbors[np.float64]
+    assert_same_rankings(indices, scores, reference_scores, exact_similarities(reference_matrix))
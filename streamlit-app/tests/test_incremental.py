@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import MovieRecommender, build_topk_neighbors
+
+K = 10
+N_ADDED = 40
+TOLERANCE = 1e-5
+
+@pytest.fixture
+def split_catalog(sample_csvs, tmp_path):
+    """A recommender built on all but the last N_ADDED movies, and the movies/credits frames of the rest"""
+    movies_csv, credits_csv = sample_csvs
+    movies = pd.read_csv(movies_csv)
+    credits = pd.read_csv(credits_csv)
+
+    base_csv = tmp_path / "base_movies.csv"
+    movies.iloc[:-N_ADDED].to_csv(base_csv, index=False)
+    # A drift threshold above any possible rate keeps add_movies incremental
+    recommender = MovieRecommender(similarity_backend="topk", top_k=K, refit_drift=2.0)
+    assert recommender.load_and_process_data(str(base_csv), credits_csv)
+    return recommender, movies.iloc[-N_ADDED:], credits
+
+def assert_matches_full_build(recommender):
+    """The live rows' neighbor lists agree with a from-scratch build on the same features"""
+    n_rows = len(recommender.movie_titles)
+    _, reference_indices, reference_scores = build_topk_neighbors(
+        recommender.feature_matrix, K, excluded=recommender.removed
+    )
+    indices = np.asarray(recommender.neighbor_indices).reshape(n_rows, K)
+    scores = np.asarray(recommender.neighbor_scores).reshape(n_rows, K)
+    reference_scores = reference_scores.reshape(n_rows, K)
+    live = np.arange(n_rows) if recommender.removed is None else np.flatnonzero(~recommender.removed)
+
+    np.testing.assert_allclose(scores[live], reference_scores[live], atol=TOLERANCE)
+    # Neighbors may only differ between movies tied on similarity
+    np.testing.assert_array_equal(indices[live] >= 0, reference_indices.reshape(n_rows, K)[live] >= 0)
+    dense = recommender.feature_matrix.toarray().astype(np.float64)
+    for row in live.tolist():
+        picked = indices[row][indices[row] >= 0]
+        assert row not in picked
+        if recommender.removed is not None:
+            assert not recommender.removed[picked].any()
+        np.testing.assert_allclose(dense[picked] @ dense[row], scores[row][:len(picked)], atol=TOLERANCE)
+
+def test_add_movies_matches_full_build(split_catalog):
+    recommender, added, credits = split_catalog
+    assert recommender.add_movies(added, credits) == N_ADDED
+    assert_matches_full_build(recommender)
+
+def test_remove_movies_matches_full_build(split_catalog):
+    recommender, added, credits = split_catalog
+    recommender.add_movies(added, credits)
+    removed = recommender.movie_titles[::25] + [added["title"].iloc[0]]
+    assert recommender.remove_movies(removed) == len(removed)
+    assert_matches_full_build(recommender)
+    served = {item["title"] for item in recommender.get_recommendations(recommender.movie_titles[1], K)}
+    assert not served & set(removed)
+
+def test_add_movies_keeps_existing_labels(split_catalog, sample_csvs):
+    recommender, _, _ = split_catalog
+    labels = list(recommender.movie_titles)
+    original = pd.read_csv(sample_csvs[0]).iloc[[0]]
+    title = original["title"].iloc[0]
+    remake = original.assign(id=original["id"] + 10 ** 9, release_date="2031-05-01")
+
+    assert recommender.add_movies(remake) == 1
+    assert recommender.movie_titles[:len(labels)] == labels
+    new_label = recommender.movie_titles[-1]
+    assert new_label != title and new_label.startswith(title)
+    assert recommender.find_movie(title) == 0
+    assert recommender.find_movie(new_label) == len(labels)
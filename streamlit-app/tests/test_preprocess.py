@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+
+from utils import preprocess_texts
+
+@pytest.fixture(scope="module")
+def texts(sample_csvs):
+    """Overviews of the sample catalog, including the empty ones"""
+    return pd.read_csv(sample_csvs[0])["overview"].fillna("").tolist()
+
+@pytest.mark.parametrize("stem", [False, True])
+def test_preprocess_output_does_not_depend_on_workers(texts, stem):
+    if stem:
+        pytest.importorskip("nltk")
+    serial = preprocess_texts(texts, stem=stem, n_jobs=1, chunk_size=64)
+    parallel = preprocess_texts(texts, stem=stem, n_jobs=3, chunk_size=64)
+    assert len(serial) == len(texts)
+    assert parallel == serial
+    # Chunking alone must not change the output either
+    assert preprocess_texts(texts, stem=stem, n_jobs=1, chunk_size=len(texts)) == serial
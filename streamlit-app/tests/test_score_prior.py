@@ -0,0 +1,20 @@
+import pytest
+
+from utils import MovieRecommender
+
+K = 5
+
+@pytest.mark.parametrize("backend", ["topk", "dense", "ann"])
+def test_batch_ranks_by_the_score_prior_like_single_queries(sample_csvs, backend):
+    recommender = MovieRecommender(similarity_backend=backend, rating_weight=1.0, popularity_weight=1.0)
+    assert recommender.load_and_process_data(*sample_csvs)
+    titles = recommender.movie_titles[:50]
+
+    frame = recommender.get_recommendations_batch(titles, K)
+    for title in titles:
+        single = recommender.get_recommendations(title, K)
+        batch = frame[frame["seed_title"] == title]
+        assert batch["title"].tolist() == [item["title"] for item in single]
+        assert batch["similarity_score"].tolist() == pytest.approx(
+            [item["similarity_score"] for item in single], abs=1e-6
+        )
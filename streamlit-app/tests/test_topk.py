@@ -0,0 +1,30 @@
+import pytest
+
+from utils import MovieRecommender
+
+TOP_K = 5
+
+@pytest.fixture(scope="module")
+def recommenders(sample_csvs):
+    """A 'topk' recommender storing TOP_K neighbors, and a 'dense' one for reference"""
+    built = {}
+    for backend in ("topk", "dense"):
+        built[backend] = MovieRecommender(similarity_backend=backend, top_k=TOP_K)
+        assert built[backend].load_and_process_data(*sample_csvs)
+    return built
+
+@pytest.mark.parametrize("filters", [None, {"genres": "Drama"}])
+def test_topk_serves_more_than_top_k_like_dense(recommenders, filters):
+    topk, dense = recommenders["topk"], recommenders["dense"]
+    for title in topk.movie_titles[:20]:
+        found = topk.get_recommendations(title, 4 * TOP_K, filters=filters)
+        expected = dense.get_recommendations(title, 4 * TOP_K, filters=filters)
+        assert [item["title"] for item in found] == [item["title"] for item in expected]
+
+def test_topk_batch_serves_more_than_top_k(recommenders):
+    topk = recommenders["topk"]
+    titles = topk.movie_titles[:20]
+    frame = topk.get_recommendations_batch(titles, 4 * TOP_K)
+    for title in titles:
+        expected = [item["title"] for item in topk.get_recommendations(title, 4 * TOP_K)]
+        assert frame[frame["seed_title"] == title]["title"].tolist() == expected